@@ -36,8 +36,9 @@ async def monitor_price():
             print(f"Il prezzo di {symbol} NON è arrivato a target...")
             print('Prezzo attuale: ', prezzo_attuale)
             print('Prezzo allert: ', prezzo_allert)
-            time.sleep(10)
-            prezzo_attuale = vedi_prezzo_moneta(categoria, symbol)
+            # Attese e richieste del prezzo non bloccano il ciclo di eventi
+            await asyncio.sleep(10)
+            prezzo_attuale = await asyncio.to_thread(vedi_prezzo_moneta, categoria, symbol)
 
     while tipo == False:
         if prezzo_attuale >= prezzo_allert:
@@ -50,8 +51,8 @@ async def monitor_price():
             print(f"Il prezzo di {symbol} NON è arrivato a target...")
             print('Prezzo attuale: ', prezzo_attuale)
             print('Prezzo allert: ', prezzo_allert)
-            time.sleep(60)
-            prezzo_attuale = vedi_prezzo_moneta(categoria, symbol)
+            await asyncio.sleep(60)
+            prezzo_attuale = await asyncio.to_thread(vedi_prezzo_moneta, categoria, symbol)
 
     print("Fine")
 
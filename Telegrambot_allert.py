@@ -1,12 +1,9 @@
 from config import *
 import webbrowser
-import telegram
-from telegram import Update, ForceReply
-from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext, ConversationHandler, JobQueue
-import asyncio
+from telegram import Update
+from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext, ConversationHandler
 from trading_functions import vedi_prezzo_moneta
 import logging
-import time
 
 
 # Stati per la conversazione
@@ -23,24 +20,27 @@ logger = logging.getLogger(__name__)
 def monitor_price(context: CallbackContext):
     job = context.job
     categoria = 'linear'
-    symbol = job.context['symbol']
-    prezzo_allert = job.context['prezzo_allert']
-    chat_id = job.context['chat_id']
+    # Leggi i dati dell'alert dal contesto del job una sola volta
+    dati_alert = job.context
+    symbol = dati_alert['symbol']
+    prezzo_allert = dati_alert['prezzo_allert']
+    chat_id = dati_alert['chat_id']
+    tipo = dati_alert['tipo']
     
     prezzo_attuale = vedi_prezzo_moneta(categoria, symbol)
 
-    if job.context['tipo']:  # Se tipo è True, controlliamo che il prezzo attuale sia minore o uguale al prezzo di alert
-        if prezzo_attuale <= prezzo_allert:
-            messaggio = f"Il prezzo di {symbol} è arrivato a {prezzo_allert}!"
-            webbrowser.open_new('https://www.bybit.com/trade/usdt/'+symbol)
-            context.bot.send_message(chat_id=chat_id, text=messaggio)
-            job.schedule_removal()
-    else:  # Se tipo è False, controlliamo che il prezzo attuale sia maggiore o uguale al prezzo di alert
-        if prezzo_attuale >= prezzo_allert:
-            messaggio = f"Il prezzo di {symbol} è arrivato a {prezzo_allert}!"
-            webbrowser.open_new('https://www.bybit.com/trade/usdt/'+symbol)
-            context.bot.send_message(chat_id=chat_id, text=messaggio)
-            job.schedule_removal()
+    # Se tipo è True, controlliamo che il prezzo attuale sia minore o uguale al prezzo di alert,
+    # altrimenti che sia maggiore o uguale
+    if tipo:
+        raggiunto = prezzo_attuale <= prezzo_allert
+    else:
+        raggiunto = prezzo_attuale >= prezzo_allert
+
+    if raggiunto:
+        messaggio = f"Il prezzo di {symbol} è arrivato a {prezzo_allert}!"
+        webbrowser.open_new('https://www.bybit.com/trade/usdt/'+symbol)
+        context.bot.send_message(chat_id=chat_id, text=messaggio)
+        job.schedule_removal()
 
 def start(update: Update, context: CallbackContext) -> int:
     """Inizia la conversazione e chiede all'utente di inserire il simbolo della moneta."""
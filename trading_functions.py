@@ -1,25 +1,25 @@
 from config import *
 import threading
-from selenium.webdriver import Chrome
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from time import sleep
 import time
 from pybit.unified_trading import HTTP
 from random import randint
-from bs4 import BeautifulSoup
-from enum import Enum
-from datetime import datetime
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 #Variabili 
 a = 1
 b = 2
 attesa = 60
+candele_minuto = 2                  #Candele di conferma sul grafico a 1 minuto prima di aprire la posizione
+debug = False                       #True = stampa i dati grezzi usati nei controlli (liste prezzi/EMA, timestamp)
 
 #CONFIGURAZIONE BROWSER#
 def configurazione_browser():
+    # Selenium viene importato solo quando serve il browser: i bot di trading e Telegram non lo usano
+    from selenium.webdriver import Chrome
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
     chrome_driver_path = leggi_txt(path)
     chrome_options = webdriver.ChromeOptions()
     chrome_options.binary_location = leggi_txt(chrome_scelto)
@@ -41,6 +41,7 @@ def leggi_txt(nome_file):
 
 #FUNZIONI SCRAPING#
 def Scraping_binance(query,driver):
+    from selenium.webdriver.common.by import By
     trovato=False
 
     url = 'https://www.binance.com/en/support/announcement/new-cryptocurrency-listing?c=48&navId=48'
@@ -52,13 +53,14 @@ def Scraping_binance(query,driver):
 
     # Salva i link in un file txt
     with open('announcements.txt', 'r+') as file:
+        # Leggi il file una sola volta: i link già salvati finiscono in un set per il controllo dei duplicati
+        link_salvati = set(file.read().splitlines())
         for link in links:
-            # Leggi il contenuto del file e controlla se il link è già presente
-            file.seek(0)
-            if link in file.read():
+            if link in link_salvati:
                 continue
             # Scrivi il link nel file e stampalo
             trovato=True
+            link_salvati.add(link)
             file.write(link + '\n')
             print("Nuovo annuncio trovato!, Verifico la Query!")
             # Controllo la query
@@ -78,6 +80,8 @@ def Scraping_binance(query,driver):
     driver.quit()
 
 def scrape_cryptopanic():
+    # BeautifulSoup viene importato solo quando serve lo scraping delle notizie
+    from bs4 import BeautifulSoup
     url = "https://cryptopanic.com/"
 
    
@@ -137,9 +141,9 @@ def save_to_txt(news_items, file_path, query_keywords=None, max_articles=10):
 
 #FUNZIONI SECONDARIE#
 def save_list_to_file(lst, filename):
+    # Prepara tutto il contenuto in memoria e scrivilo con una sola chiamata
     with open(filename, 'w') as f:
-        for item in lst:
-            f.write("%s\n" % item)
+        f.write("".join("%s\n" % item for item in lst))
 
 def is_name_in_string(name, string):
     #Restituisce True se il nome è presente nella stringa, False altrimenti.
@@ -170,6 +174,16 @@ def execute_thread(func, args):
     thread.start()
     return thread
 #FUNZIONI BYBIT#
+sessione = None
+
+def sessione_bybit():
+    # Crea la sessione HTTP una sola volta e la riutilizza per tutte le chiamate,
+    # così le connessioni verso api.bybit.com restano aperte (keep-alive)
+    global sessione
+    if sessione is None:
+        sessione = HTTP(testnet=False, api_key=api, api_secret=api_sec)
+    return sessione
+
 def get_server_time():
     response = requests.get("https://api.bybit.com/v2/public/time")
     if response.status_code == 200:
@@ -180,23 +194,22 @@ def get_server_time():
         return None
     
 def check_timestamp(recv_window, timestamp):
-    server_time = get_server_time() * 1000  # Converti il tempo Unix in millisecondi
+    # Chiedi il tempo del server una sola volta e controlla None prima di convertirlo
+    server_time = get_server_time()
     if server_time is not None:
+        server_time = server_time * 1000  # Converti il tempo Unix in millisecondi
         lower_bound = server_time - recv_window
         upper_bound = server_time + 1000
-        print("Lower Bound:", lower_bound)
-        print("Upper Bound:", upper_bound)
-        print("Timestamp:", timestamp)
+        if debug:
+            print("Lower Bound:", lower_bound)
+            print("Upper Bound:", upper_bound)
+            print("Timestamp:", timestamp)
         return lower_bound <= timestamp < upper_bound
     else:
         return False
 
 def compra_moneta_bybit2(categoria, pair, quantita):
-    session = HTTP(
-        testnet=False,
-        api_key=api,
-        api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     # Ottieni il timestamp attuale
     timestamp = int(time.time() * 1000)
@@ -236,11 +249,7 @@ def compra_moneta_bybit_by_quantita(categoria,pair,quantita):
     prezzo = vedi_prezzo_moneta(categoria,pair)
     token = int(quantita/prezzo)
 
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     print(session.place_order(
     category=categoria,
@@ -252,11 +261,7 @@ def compra_moneta_bybit_by_quantita(categoria,pair,quantita):
     return token
 
 def compra_moneta_bybit_by_token(categoria,pair,token):
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     print(session.place_order(
     category=categoria,
@@ -271,11 +276,7 @@ def vendi_moneta_bybit_by_quantita(categoria,pair,quantita):
     prezzo = vedi_prezzo_moneta(categoria,pair)
     token = int(quantita/prezzo)
 
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     
     print(session.place_order(
@@ -288,11 +289,7 @@ def vendi_moneta_bybit_by_quantita(categoria,pair,quantita):
     return token
 
 def vendi_moneta_bybit_by_token(categoria,pair,token):
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     print(session.place_order(
     category=categoria,
@@ -304,11 +301,7 @@ def vendi_moneta_bybit_by_token(categoria,pair,token):
     return token
 
 def chiudi_operazione_long(categoria,pair,token):
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     print(session.place_order(
     category=categoria,
@@ -319,11 +312,7 @@ def chiudi_operazione_long(categoria,pair,token):
     ))
 
 def chiudi_operazione_short(categoria,pair,token):
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     
     print(session.place_order(
     category=categoria,
@@ -334,11 +323,7 @@ def chiudi_operazione_short(categoria,pair,token):
     ))
     
 def vedi_prezzo_moneta(categoria,pair):
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     response = session.get_orderbook(category=categoria, symbol=pair)
     b_values = response['result']['b']
 
@@ -348,11 +333,7 @@ def vedi_prezzo_moneta(categoria,pair):
 
 def mostra_saldo():
     # Get wallet balance of the Unified Trading Account
-    session = HTTP(
-    testnet=False,
-    api_key=api,
-    api_secret=api_sec,
-    )
+    session = sessione_bybit()
     response = session.get_wallet_balance(accountType="UNIFIED")
     response_data = response['result']['list'][0]  # Accedi alla parte del dizionario che contiene i dati dell'account
     total_equity = response_data['totalEquity']  # Estrai il valore di 'totalEquity'
@@ -360,15 +341,14 @@ def mostra_saldo():
     # Stampa o fai ciò che vuoi con 'total_equity'
     print(f'Total Equity: {total_equity}')
 
-    from datetime import datetime, timedelta
-
 def ottieni_prezzi(categoria,simbolo):
-    session = HTTP(testnet=False, api_key=api, api_secret=api_sec)
+    # Riutilizza la sessione HTTP condivisa con le tue chiavi API
+    session = sessione_bybit()
     print(session.get_orderbook(category=categoria, symbol=simbolo))
 
 def get_kline_printato(categoria, simbolo, intervallo, limit):
-    # Inizializza la sessione HTTP con le tue chiavi API
-    session = HTTP(testnet=False, api_key=api, api_secret=api_sec)
+    # Riutilizza la sessione HTTP condivisa con le tue chiavi API
+    session = sessione_bybit()
 
     # Ottieni i dati Kline per il simbolo specifico con il limite specificato
     kline_data = session.get_kline(
@@ -378,10 +358,11 @@ def get_kline_printato(categoria, simbolo, intervallo, limit):
         limit=limit
     )["result"]
 
-    # Verifica se ci sono dati disponibili
-    if "list" in kline_data and kline_data["list"]:
+    # Verifica se ci sono dati disponibili (una sola ricerca nel dizionario)
+    klines = kline_data.get("list")
+    if klines:
         # Inverti l'ordine della lista dei dati Kline
-        reversed_klines = reversed(kline_data["list"])
+        reversed_klines = reversed(klines)
         # Itera sul numero di candele nella lista
         for i, data_list in enumerate(reversed_klines):
             # Stampa i dati Kline
@@ -394,8 +375,8 @@ def get_kline_printato(categoria, simbolo, intervallo, limit):
         print(f"Nessun dato Kline disponibile per il simbolo {simbolo}")
 
 def get_kline_data(categoria, simbolo, intervallo, limit=200):
-    # Inizializza la sessione HTTP con le tue chiavi API
-    session = HTTP(testnet=False, api_key=api, api_secret=api_sec)
+    # Riutilizza la sessione HTTP condivisa con le tue chiavi API
+    session = sessione_bybit()
 
     # Ottieni i dati Kline per il simbolo specifico con il limite specificato
     kline_data = session.get_kline(
@@ -405,29 +386,46 @@ def get_kline_data(categoria, simbolo, intervallo, limit=200):
         limit=limit
     )["result"]
 
-    # Verifica se ci sono dati disponibili
-    if "list" in kline_data and kline_data["list"]:
+    # Verifica se ci sono dati disponibili (una sola ricerca nel dizionario)
+    klines = kline_data.get("list")
+    if klines:
         # Restituisci la lista dei dati Kline
-        return kline_data["list"]
+        return klines
     else:
         print(f"Nessun dato Kline disponibile per il simbolo {simbolo}")
         return []
 
+def estrai_prezzi_chiusura(kline_data):
+    # Bybit restituisce le candele dalla più recente alla più vecchia:
+    # converte i prezzi di chiusura in un unico passaggio, già in ordine cronologico
+    return [float(data[4]) for data in reversed(kline_data)]
+
 #FUNZIONI TRADING#
 def totale_pnl(quantita_acquistata, prezzo_acquisto, prezzo_attuale):
     return (prezzo_attuale - prezzo_acquisto) * quantita_acquistata 
 
 def calculate_simple_moving_average(prices, period):
-    # Calcola la media mobile semplice
-    sma = [sum(prices[i - period + 1:i + 1]) / period for i in range(period - 1, len(prices))]
+    # Calcola la media mobile semplice con una somma mobile: ad ogni candela aggiunge
+    # il prezzo nuovo e toglie quello uscito dalla finestra, invece di risommare tutto il periodo
+    if len(prices) < period:
+        return []
+    somma = sum(prices[:period])
+    sma = [somma / period]
+    for i in range(period, len(prices)):
+        somma += prices[i] - prices[i - period]
+        sma.append(somma / period)
     return sma
 
 def media_esponenziale(prices, period):
     alpha = 2 / (period + 1)
-    ema = [prices[0]]
+    # Calcola (1 - alpha) una sola volta e tiene l'ultimo valore in una variabile locale
+    # invece di rileggerlo dalla lista ad ogni passo
+    complemento_alpha = 1 - alpha
+    ema_t = prices[0]
+    ema = [ema_t]
 
     for i in range(1, len(prices)):
-        ema_t = (prices[i] * alpha) + (ema[i - 1] * (1 - alpha))
+        ema_t = (prices[i] * alpha) + (ema_t * complemento_alpha)
         ema.append(ema_t)
 
     return ema
@@ -435,147 +433,100 @@ def media_esponenziale(prices, period):
 def candele_sopra_ema(categoria, simbolo, intervallo, periodo_ema,numero_candele):
     # Ottieni tutti i dati Kline (ultime 200 candele)
     kline_data_all = get_kline_data(categoria, simbolo, intervallo, limit=200)
-    
-    kline_data_last_5 = kline_data_all[:numero_candele]
 
-    # Estrai le open prices dalle ultime x candele
-    open_prices_last_5 = [float(data[4]) for data in kline_data_last_5]
-    print(open_prices_last_5)
-
-    # Cambia l'ordine dei dati per il calcolo dell'ema.
-    reversed_klines = reversed(kline_data_all)
-    # Estrai tutte le open prices per il calcolo dell'EMA
-    open_prices_all = [float(data[4]) for data in reversed_klines]
+    # Estrai tutte le close prices, in ordine cronologico, per il calcolo dell'EMA
+    close_prices = estrai_prezzi_chiusura(kline_data_all)
 
     # Calcola l'EMA 
-    ema= media_esponenziale(open_prices_all, periodo_ema)
-    
-    reversed_ema=list(reversed(ema))
-    print(reversed_ema)
-    # Verifica se tutte le open prices delle ultime 5 candele sono sopra l'EMA
-    all_above_ema = all(open_price > reversed_ema[i] for i, open_price in enumerate(open_prices_last_5))
+    ema= media_esponenziale(close_prices, periodo_ema)
+
+    # Indici delle ultime x candele, dalla più recente: le liste si leggono per indice,
+    # senza copiarle, invertirle o convertire di nuovo le righe Kline
+    ultima = len(close_prices) - 1
+    ultime_candele = range(ultima, max(ultima - numero_candele, -1), -1)
+    if debug:
+        print([close_prices[i] for i in ultime_candele])
+        print([ema[i] for i in ultime_candele])
+    # Verifica se tutte le close prices delle ultime x candele sono sopra l'EMA
+    all_above_ema = all(close_prices[i] > ema[i] for i in ultime_candele)
 
     return all_above_ema
 
-def controlla_candele_sopra_ema(categoria, coppia, intervallo, periodo_ema):
-        candele_sopra_ema = 0
-        # Ottieni i dati Kline per la coppia corrente
-        kline_data_all = get_kline_data(categoria, coppia, intervallo, limit=200)
+def distanza_percentuale_ema(prezzo, valore_ema):
+    # Differenza in percentuale tra il prezzo e l'EMA (positiva se il prezzo è sopra)
+    return ((prezzo - valore_ema) / valore_ema) * 100
+
+def conta_candele_consecutive(close_prices, ema, sopra=True):
+    # Conta le candele consecutive, partendo dalla più recente, che hanno chiuso sopra (o sotto) l'EMA.
+    # Le liste sono in ordine cronologico: si scorrono dalla fine, senza invertirle o copiarle.
+    candele = 0
+    for i in range(len(close_prices) - 1, -1, -1):
+        if sopra and close_prices[i] < ema[i]:
+            break  # Fermati non appena una candela si trova sotto l'EMA
+        if not sopra and close_prices[i] > ema[i]:
+            break  # Fermati non appena una candela si trova sopra l'EMA
+        candele += 1
+    return candele
+
+def controlla_candele_ema(categoria, coppia, intervallo, periodo_ema, sopra, kline_data_all=None):
+        # Ottieni i dati Kline per la coppia corrente, se non sono già stati scaricati
+        if kline_data_all is None:
+            kline_data_all = get_kline_data(categoria, coppia, intervallo, limit=200)
         
         if kline_data_all:
-            # Estrai il timestamp della prima candela nei nuovi dati Kline
-            timespamp_totali = [float(data[0]) for data in kline_data_all]
-            # Estrai il timestamp piu recente
-            timestamp_attuale= timespamp_totali[-1]
-
-            risultato = 0
-            kline_data_last_200 = kline_data_all[:200]
-
-            # Estrai le open prices dalle ultime x candele
-            close_prices_200 = [float(data[4]) for data in kline_data_last_200]
-            
-            # Cambia l'ordine dei dati per il calcolo dell'ema.
-            reversed_klines = reversed(kline_data_all)
+            # Estrai il timestamp dall'ultima riga dei dati Kline, senza convertire tutta la lista
+            timestamp_attuale = float(kline_data_all[-1][0])
 
-            # Estrai tutte le open prices per il calcolo dell'EMA
-            close_prices = [float(data[4]) for data in reversed_klines]
+            # Estrai tutte le close prices, in ordine cronologico, per il calcolo dell'EMA
+            close_prices = estrai_prezzi_chiusura(kline_data_all)
             # Estrai il prezzo di chiusura più recente
             prezzo_attuale = close_prices[-1]
 
             # Calcola l'EMA 
             ema = media_esponenziale(close_prices, periodo_ema)
-            reversed_ema=list(reversed(ema))
 
             # Calcola la differenza in percentuale tra il prezzo attuale e l'EMA
-            differenza_percentuale = ((prezzo_attuale - ema[-1]) / ema[-1]) * 100
-            
+            differenza_percentuale = distanza_percentuale_ema(prezzo_attuale, ema[-1])
             
-            # Verifica quanti periodi consecutivi la coppia ha chiuso sopra l'EMA
-            for i, close_price in enumerate(close_prices_200):
-                if close_price < reversed_ema[i]:
-                    break  # Fermati non appena una candela si trova sotto l'EMA
-                else:
-                    candele_sopra_ema += 1
-            if candele_sopra_ema > 0:      
-                risultato = candele_sopra_ema 
+            # Verifica quanti periodi consecutivi la coppia ha chiuso sopra (o sotto) l'EMA
+            risultato = conta_candele_consecutive(close_prices, ema, sopra)
 
         return risultato,prezzo_attuale,differenza_percentuale,timestamp_attuale
 
-def controlla_candele_sotto_ema(categoria, coppia, intervallo, periodo_ema):
-        candele_sopra_ema = 0
-        # Ottieni i dati Kline per la coppia corrente
-        kline_data_all = get_kline_data(categoria, coppia, intervallo, limit=200)
-        
-        if kline_data_all:
-            # Estrai il timestamp della prima candela nei nuovi dati Kline
-            timespamp_totali = [float(data[0]) for data in kline_data_all]
-            # Estrai il timestamp piu recente
-            timestamp_attuale= timespamp_totali[-1]
-
-            risultato = 0
-            kline_data_last_200 = kline_data_all[:200]
-
-            # Estrai le open prices dalle ultime x candele
-            close_prices_200 = [float(data[4]) for data in kline_data_last_200]
-            
-            # Cambia l'ordine dei dati per il calcolo dell'ema.
-            reversed_klines = reversed(kline_data_all)
-
-            # Estrai tutte le open prices per il calcolo dell'EMA
-            close_prices = [float(data[4]) for data in reversed_klines]
-            # Estrai il prezzo di chiusura più recente
-            prezzo_attuale = close_prices[-1]
-
-            # Calcola l'EMA 
-            ema = media_esponenziale(close_prices, periodo_ema)
-            reversed_ema=list(reversed(ema))
-
-            # Calcola la differenza in percentuale tra il prezzo attuale e l'EMA
-            differenza_percentuale = ((prezzo_attuale - ema[-1]) / ema[-1]) * 100
-            
-            
-            # Verifica quanti periodi consecutivi la coppia ha chiuso sopra l'EMA
-            for i, close_price in enumerate(close_prices_200):
-                if close_price > reversed_ema[i]:
-                    break  # Fermati non appena una candela si trova sotto l'EMA
-                else:
-                    candele_sopra_ema += 1
-            if candele_sopra_ema > 0:      
-                risultato = candele_sopra_ema 
+def controlla_candele_sopra_ema(categoria, coppia, intervallo, periodo_ema, kline_data_all=None):
+        return controlla_candele_ema(categoria, coppia, intervallo, periodo_ema, True, kline_data_all)
 
-        return risultato,prezzo_attuale,differenza_percentuale,timestamp_attuale
+def controlla_candele_sotto_ema(categoria, coppia, intervallo, periodo_ema, kline_data_all=None):
+        return controlla_candele_ema(categoria, coppia, intervallo, periodo_ema, False, kline_data_all)
 
-def analizza_prezzo_sopra_media(categoria, simbolo, intervallo, periodo_ema):
-        # Ottieni i dati Kline per la coppia corrente
-        kline_data_all = get_kline_data(categoria, simbolo, intervallo, limit=200)
+def analizza_prezzo_sopra_media(categoria, simbolo, intervallo, periodo_ema, kline_data_all=None):
+        # Ottieni i dati Kline per la coppia corrente, se non sono già stati scaricati
+        if kline_data_all is None:
+            kline_data_all = get_kline_data(categoria, simbolo, intervallo, limit=200)
         
         if kline_data_all:
-            # Estrai il timestamp della prima candela nei nuovi dati Kline
-            timespamp_totali = [float(data[0]) for data in kline_data_all]
-            # Estrai il timestamp piu recente
-            timestamp_attuale= timespamp_totali[-1]
+            # Estrai il timestamp dall'ultima riga dei dati Kline, senza convertire tutta la lista
+            timestamp_attuale = float(kline_data_all[-1][0])
          
-            # Cambia l'ordine dei dati per il calcolo dell'ema.
-            reversed_klines = reversed(kline_data_all)
-
-            # Estrai tutte le close prices per il calcolo dell'EMA
-            close_prices = [float(data[4]) for data in reversed_klines]
+            # Estrai tutte le close prices, in ordine cronologico, per il calcolo dell'EMA
+            close_prices = estrai_prezzi_chiusura(kline_data_all)
 
             # Calcola l'EMA 
             ema = media_esponenziale(close_prices, periodo_ema)
-            reversed_ema=list(reversed(ema))
 
             # Estrai il prezzo di chiusura più recente
             prezzo_attuale = close_prices[-1]
             # Calcola la differenza in percentuale tra il prezzo attuale e l'EMA
-            differenza_percentuale = ((prezzo_attuale - ema[-1]) / ema[-1]) * 100
+            differenza_percentuale = distanza_percentuale_ema(prezzo_attuale, ema[-1])
             
-            # Controlla se il prezzo di chiusura più recente è sopra la EMA
-            
-            sopra_ema = prezzo_attuale > reversed_ema[-1]
+            # Il prezzo di chiusura più recente è sopra la EMA se la differenza è positiva
+            sopra_ema = differenza_percentuale > 0
 
         return sopra_ema, differenza_percentuale,prezzo_attuale,timestamp_attuale
 
+#Timeframe analizzati da bot_analisi: (intervallo Bybit, nome del grafico)
+timeframe_analisi = [("M", "mensile"), ("W", "Settimanale"), ("D", "Giornaliero"), ("240", "4 ore")]
+
 def bot_analisi(categoria,periodo_ema):
     
     menu = input("MENU\n1-Analizza coppia \n2-Scraping allert\n3-Visualizza tutti gli Allert\n4-Elimina un allert\nInserisci un valore: ")
@@ -586,62 +537,27 @@ def bot_analisi(categoria,periodo_ema):
         print(f"\nHai scelto: {simbolo} "
             f"\nEma utilizzata:{periodo_ema}"
             )
-        print(f"\nAnalizzo il grafico mensile:")
-        analisi = analizza_prezzo_sopra_media(categoria, simbolo, "M", periodo_ema)
-        sopra_ema = analisi[0]
-        differenza_percentuale = analisi[1]
-        if sopra_ema == True:
-            analisi = controlla_candele_sopra_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sopra l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-            
-
-        else:
-            analisi = controlla_candele_sotto_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sotto l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-
-        print(f"\nAnalizzo il grafico Settimanale:")
-        analisi = analizza_prezzo_sopra_media(categoria, simbolo, "W", periodo_ema)
-        sopra_ema = analisi[0]
-        differenza_percentuale = analisi[1]
-        if sopra_ema == True:
-            analisi = controlla_candele_sopra_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sopra l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-            
-        else:
-            analisi = controlla_candele_sotto_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sotto l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-        
-        print(f"\nAnalizzo il grafico Giornaliero:")
-        analisi = analizza_prezzo_sopra_media(categoria, simbolo, "D", periodo_ema)
-        sopra_ema = analisi[0]
-        differenza_percentuale = analisi[1]
-        if sopra_ema == True:
-            analisi = controlla_candele_sopra_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sopra l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-        else:
-            analisi = controlla_candele_sotto_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sotto l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-
-        
-        print(f"\nAnalizzo il grafico 4 ore:")
-        analisi = analizza_prezzo_sopra_media(categoria, simbolo, "240", periodo_ema)
-        sopra_ema = analisi[0]
-        differenza_percentuale = analisi[1]
-        if sopra_ema == True:
-            analisi = controlla_candele_sopra_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sopra l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-        else:
-            analisi = controlla_candele_sotto_ema(categoria, simbolo,"M", periodo_ema)
-            risultato = analisi[0]
-            print(f"la coppia: {simbolo} si trova sotto l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
-
+        # Scarica in parallelo i dati Kline di tutti i timeframe: ogni download aspetta la rete,
+        # quindi farli insieme costa circa quanto il più lento invece della somma
+        with ThreadPoolExecutor(max_workers=len(timeframe_analisi)) as executor:
+            klines_timeframe = list(executor.map(
+                lambda timeframe: get_kline_data(categoria, simbolo, timeframe[0], limit=200),
+                timeframe_analisi
+            ))
+
+        for (intervallo, nome_grafico), kline_data_all in zip(timeframe_analisi, klines_timeframe):
+            print(f"\nAnalizzo il grafico {nome_grafico}:")
+            # Prezzi, EMA e distanza vengono calcolati una sola volta per timeframe
+            # e riutilizzati sia per la posizione rispetto all'EMA sia per il conteggio delle candele
+            close_prices = estrai_prezzi_chiusura(kline_data_all)
+            ema = media_esponenziale(close_prices, periodo_ema)
+            differenza_percentuale = distanza_percentuale_ema(close_prices[-1], ema[-1])
+            sopra_ema = differenza_percentuale > 0
+            risultato = conta_candele_consecutive(close_prices, ema, sopra_ema)
+            if sopra_ema == True:
+                print(f"la coppia: {simbolo} si trova sopra l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
+            else:
+                print(f"la coppia: {simbolo} si trova sotto l'ema {periodo_ema} del {differenza_percentuale:.2f}%. da {risultato} candele")
 
         input("\nPremere Enter per tornare indietro...")
         return bot_analisi(categoria,periodo_ema)
@@ -654,44 +570,44 @@ def bot_analisi(categoria,periodo_ema):
 
 def nuova_candela(kline_data, ultimo_timestamp_precedente):
 
-    # Estrai il timestamp della prima candela nei nuovi dati Kline
-    timespamp_totali = [float(data[0]) for data in kline_data]
-
-    # Estrai il timestamp piu recente
-    nuovo_timestamp = timespamp_totali[-1]
-    print(nuovo_timestamp)
+    # Estrai il timestamp dall'ultima riga dei nuovi dati Kline
+    nuovo_timestamp = estrai_ultimo_timestamp(kline_data)
+    if debug:
+        print(nuovo_timestamp)
 
-    # Confronta il timestamp della prima candela nei nuovi dati Kline con il timestamp precedente
+    # Confronta il timestamp dei nuovi dati Kline con il timestamp precedente
     return nuovo_timestamp != ultimo_timestamp_precedente
 
 def estrai_ultimo_timestamp(kline_data):
-    # Estrai il timestamp della prima candela nei nuovi dati Kline
-    timespamp_totali = [float(data[0]) for data in kline_data]
-    # Estrai il timestamp piu recente
-    timestamp_attuale= timespamp_totali[-1]
+    # Converte solo la riga che serve invece di tutta la lista dei timestamp
+    timestamp_attuale = float(kline_data[-1][0])
     return timestamp_attuale
 
 def estrai_prezzo_ultima_candela(kline_data):
-    close_prices = [float(data[4]) for data in kline_data]
-    last_price = close_prices[-1]
+    # Converte solo la riga che serve invece di tutta la lista dei prezzi
+    last_price = float(kline_data[-1][4])
     return last_price
 
 def bot_trailing_stop(categoria,simbolo,periodo_ema,intervallo,token,candele,operazione):
+    # Il tipo di operazione non cambia durante il ciclo: scegli le funzioni una sola volta
+    if operazione == True:
+        controlla_candele = controlla_candele_sotto_ema
+        chiudi = chiudi_operazione_long
+    else:
+        controlla_candele = controlla_candele_sopra_ema
+        chiudi = chiudi_operazione_short
     chiudi_operazione = True
     timestamp_precedente = 0
     while chiudi_operazione == True:
         #ESTRAZIONE GRAFICO
-        
+        # I dati scaricati qui vengono riutilizzati anche per l'analisi, senza scaricarli di nuovo
         kline_data_all = get_kline_data(categoria, simbolo, intervallo, limit=200)
         timestamp_attuale = estrai_ultimo_timestamp(kline_data_all)
         if timestamp_attuale != timestamp_precedente:
             print("Nuova Candela")
             print(f"\nAnalizzo il grafico con Ema {periodo_ema}")
             #ANALISI DEL GRAFICO
-            if operazione == True:
-                analisi = controlla_candele_sotto_ema(categoria, simbolo, intervallo, periodo_ema)
-            else:
-                analisi = controlla_candele_sopra_ema(categoria, simbolo, intervallo, periodo_ema)
+            analisi = controlla_candele(categoria, simbolo, intervallo, periodo_ema, kline_data_all)
             risultato = analisi[0]
             prezzo = analisi[1]
             differenza_percentuale = analisi[2]
@@ -705,10 +621,7 @@ def bot_trailing_stop(categoria,simbolo,periodo_ema,intervallo,token,candele,ope
             else:
                 print(f"la coppia: {simbolo} si trova a {prezzo} con differenza dall'ema del {(differenza_percentuale):.2f}% da {risultato} candele ")
                 print(f"Candele raggiunte, chiudo l'operazione...")
-                if operazione == True:
-                    token = chiudi_operazione_long(categoria,simbolo,token)
-                else:
-                    token = chiudi_operazione_short(categoria,simbolo,token)
+                token = chiudi(categoria,simbolo,token)
                 chiudi_operazione = False
                 
         else:
@@ -727,20 +640,25 @@ def bot_open_position(categoria,simbolo,periodo_ema,intervallo,quantita,candele,
     else:
         print(f"\nTipo di operazione.: SHORT")
     sleep(3)
+    # Il tipo di operazione non cambia durante il ciclo: scegli le funzioni una sola volta
+    if operazione == True:
+        controlla_candele = controlla_candele_sopra_ema
+        apri = compra_moneta_bybit_by_quantita
+    else:
+        controlla_candele = controlla_candele_sotto_ema
+        apri = vendi_moneta_bybit_by_quantita
     timestamp_precedente = 0
     cerca_operazione = True
     while cerca_operazione == True:
         #ESTRAZIONE GRAFICO
+        # I dati scaricati qui vengono riutilizzati anche per l'analisi, senza scaricarli di nuovo
         kline_data_all = get_kline_data(categoria, simbolo, intervallo, limit=200)
         timestamp_attuale = estrai_ultimo_timestamp(kline_data_all)
         if timestamp_attuale != timestamp_precedente:
             print("Nuova Candela")
             print(f"Analizzo il grafico di  {simbolo} con Ema {periodo_ema}")
             #ANALISI DEL GRAFICO
-            if operazione == True:
-                analisi = controlla_candele_sopra_ema(categoria, simbolo, intervallo, periodo_ema)
-            else:
-                analisi = controlla_candele_sotto_ema(categoria, simbolo, intervallo, periodo_ema)
+            analisi = controlla_candele(categoria, simbolo, intervallo, periodo_ema, kline_data_all)
             risultato = analisi[0]
             prezzo = analisi[1]
             differenza_percentuale = analisi[2]
@@ -759,27 +677,20 @@ def bot_open_position(categoria,simbolo,periodo_ema,intervallo,quantita,candele,
                 else:
 
                     #Analisi sul grafico sul minuto
-                    if operazione == True:
-                        analisi = controlla_candele_sopra_ema(categoria, simbolo, 1, periodo_ema)
-                    else:
-                        analisi = controlla_candele_sotto_ema(categoria, simbolo, 1, periodo_ema)
+                    analisi = controlla_candele(categoria, simbolo, 1, periodo_ema)
 
                     risultato = analisi[0]
                     prezzo = analisi[1]
                     differenza_percentuale = analisi[2]
                     timestamp_attuale = analisi[3]
                     timestamp_precedente = timestamp_attuale
-                    candele_minuto = 2
                     if risultato <= candele_minuto:
                         print(f"la coppia: {simbolo} si trova a {prezzo} con differenza dall'ema sul minuto del {(differenza_percentuale):.2f}% da {risultato} candele ")
                         print(f"Candele non raggiunte...")
                     else:
                         print(f"la coppia: {simbolo} si trova a {prezzo} con differenza dall'ema sul minuto del {(differenza_percentuale):.2f}% da {risultato} candele ")
                         print(f"Candele raggiunte!")
-                        if operazione == True:
-                            token = compra_moneta_bybit_by_quantita(categoria,simbolo,quantita)
-                        else:
-                            token = vendi_moneta_bybit_by_quantita(categoria,simbolo,quantita)
+                        token = apri(categoria,simbolo,quantita)
                         print(f"Ho comprato: {token} {simbolo} a {prezzo} ")
                         cerca_operazione = False
                         sleep(attesa)
@@ -791,10 +702,7 @@ def bot_open_position(categoria,simbolo,periodo_ema,intervallo,quantita,candele,
             else:
                 print("Aspetto la nuova candela...")
                 #ANALISI DEL GRAFICO
-                if operazione == True:
-                    analisi = controlla_candele_sopra_ema(categoria, simbolo, intervallo, periodo_ema)
-                else:
-                    analisi = controlla_candele_sotto_ema(categoria, simbolo, intervallo, periodo_ema)
+                analisi = controlla_candele(categoria, simbolo, intervallo, periodo_ema, kline_data_all)
                 risultato = analisi[0]
                 prezzo = analisi[1]
                 differenza_percentuale = analisi[2]
@@ -805,27 +713,20 @@ def bot_open_position(categoria,simbolo,periodo_ema,intervallo,quantita,candele,
                     print(f"Prezzo troppo per alto per la media, aspetto prossima candela...")
                 else:
                     #Analisi sul grafico sul minuto
-                    if operazione == True:
-                        analisi = controlla_candele_sopra_ema(categoria, simbolo, 1, periodo_ema)
-                    else:
-                        analisi = controlla_candele_sotto_ema(categoria, simbolo, 1, periodo_ema)
+                    analisi = controlla_candele(categoria, simbolo, 1, periodo_ema)
 
                     risultato = analisi[0]
                     prezzo = analisi[1]
                     differenza_percentuale = analisi[2]
                     timestamp_attuale = analisi[3]
                     timestamp_precedente = timestamp_attuale
-                    candele_minuto = 2
                     if risultato < candele_minuto:
                         print(f"la coppia: {simbolo} si trova a {prezzo} con differenza dall'ema sul minuto del {(differenza_percentuale):.2f}% da {risultato} candele ")
                         print(f"Candele non raggiunte...")
                     else:
                         print(f"la coppia: {simbolo} si trova a {prezzo} con differenza dall'ema sul minuto del {(differenza_percentuale):.2f}% da {risultato} candele ")
                         print(f"Candele raggiunte!")
-                        if operazione == True:
-                            token = compra_moneta_bybit_by_quantita(categoria,simbolo,quantita)
-                        else:
-                            token = vendi_moneta_bybit_by_quantita(categoria,simbolo,quantita)
+                        token = apri(categoria,simbolo,quantita)
                         print(f"Ho comprato: {token} {simbolo} a {prezzo} ")
                         cerca_operazione = False
                 sleep(attesa)